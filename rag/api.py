@@ -77,7 +77,7 @@ def build_pipeline(
     retriever = build_hybrid_retriever(cfg=cfg, chunk_size=chunk_size, overlap=overlap, reindex=reindex)
     log.info("Retriever is ready.", extra={"log_type": "INFO"})
 
-    reranker = Reranker()
+    reranker = Reranker(cfg=cfg)
     compressor = ContextCompressor(cfg)
 
     return RAGPipeline(
@@ -161,10 +161,8 @@ def process_query(
 
         results = []
         retrieve_start = time.perf_counter()
-        for q in query_set:
-            results.extend(
-                pipeline.retriever.retrieve(q, language=language, category=category)
-            )
+        for hits in pipeline.retriever.retrieve_many(query_set, language=language, category=category):
+            results.extend(hits)
         total_retrieve_s += time.perf_counter() - retrieve_start
 
         if not results:
@@ -5,7 +5,8 @@ from __future__ import annotations
 
 import logging
 import re
-from pydantic import BaseModel
+from dataclasses import dataclass
+from typing import Any, Mapping
 
 from rag.ingest import RawDocument
 from rag.config import RAGConfig
@@ -14,8 +15,9 @@ from support_function.detect_function import detect_language
 log = logging.getLogger(__name__)
 
 
-class Chunk(BaseModel):
-    """A Pydantic model for a text chunk from a document."""
+@dataclass(slots=True)
+class Chunk:
+    """A text chunk from a document."""
     id: str
     doc_id: str
     text: str
@@ -28,6 +30,66 @@ class Chunk(BaseModel):
     category: str | None = None
     allowed_roles: str | None = None
 
+    @classmethod
+    def from_es_hit(cls, src: dict[str, Any]) -> Chunk:
+        """Builds a chunk from the `_source` of an Elasticsearch hit."""
+        return cls(
+            id=src["id"],
+            doc_id=src["doc_id"],
+            doc_name=src["doc_name"],
+            text=src.get("text", ""),
+            order=src["order"],
+            section_title=src.get("section_title"),
+            start_char=src.get("start_char", 0),
+            end_char=src.get("end_char", 0),
+            language=src.get("language"),
+            category=src.get("category"),
+        )
+
+    @classmethod
+    def from_chroma(cls, chunk_id: str, document: str, meta: Mapping[str, Any]) -> Chunk:
+        """Builds a chunk from a ChromaDB record (id, document, metadata), binding fields positionally."""
+        get = meta.get
+        return cls(
+            chunk_id,
+            meta["doc_id"],
+            document,
+            meta["order"],
+            get("start_char", 0),
+            get("end_char", 0),
+            meta["doc_name"],
+            get("section_title"),
+            get("language"),
+            get("category"),
+            get("allowed_roles"),
+        )
+
+
+@dataclass(slots=True)
+class ChunkTable:
+    """Column-wise view of a list of chunks, for passes that only touch a few fields."""
+    ids: list[str]
+    doc_ids: list[str]
+    texts: list[str]
+    section_titles: list[str | None]
+    orders: list[int]
+
+    @classmethod
+    def from_chunks(cls, chunks: list[Chunk]) -> ChunkTable:
+        """Builds the table in one pass over the chunks."""
+        if not chunks:
+            return cls([], [], [], [], [])
+        ids, doc_ids, texts, section_titles, orders = zip(
+            *((c.id, c.doc_id, c.text, c.section_title, c.order) for c in chunks)
+        )
+        return cls(list(ids), list(doc_ids), list(texts), list(section_titles), list(orders))
+
+    def embedding_texts(self, with_section_title: bool) -> list[str]:
+        """Returns the texts to embed, optionally prefixed with their section titles."""
+        if not with_section_title:
+            return self.texts
+        return [st + "\n" + t if st else t for st, t in zip(self.section_titles, self.texts)]
+
 
 def chunk_documents(
     docs: list[RawDocument],
@@ -3,15 +3,46 @@ This module defines the configuration for the RAG pipeline using Pydantic.
 It centralizes all key parameters, making them accessible and manageable from one place.
 """
 from __future__ import annotations
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Any, Callable
 from pathlib import Path
-import torch
+from functools import lru_cache
 import logging
 
 log = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _detect_device() -> str:
+    """Returns 'cuda' if available, otherwise 'cpu'. Torch is imported lazily."""
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+_DEFAULT_COMPRESSOR_PROMPT = (
+    "Ты — система очистки контекста для Retrieval-Augmented Generation.\n"
+    "Вопрос пользователя:\n"
+    "{question}\n\n"
+    "Ниже приведены фрагменты текста из базы знаний.\n"
+    "Твоя задача — вернуть ОДИН связный, осмысленный кусок текста, который "
+    "отвечает на вопрос.\n"
+    "Не добавляй новые знания и не смешивай разные темы.\n"
+    "Пиши одним блоком текста, без списков.\n\n"
+    "Правила:\n"
+    "- Возвращай один цельный абзац\n"
+    "- Удали явные повторы и технический мусор\n"
+    "- Не включай смежные темы, примеры и инструкции, если они не нужны для ответа\n"
+    "- Не добавляй новых сведений и не делай выводов\n"
+    "- Но не сокращай слишком сильно, все то что по теме должно содержаться в ответе\n\n"
+    "Фрагменты:\n"
+    "{fragments_text}\n\n"
+    "Формат ответа:\n"
+    "<один связный абзац>\n\n"
+    "Ответ:\n"
+)
+
+
 def default_vector_filter_builder(where: dict[str, Any]) -> dict[str, Any] | None:
     return None
 
@@ -31,6 +62,8 @@ class RAGConfig(BaseModel):
 
     rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
     """The name of the cross-encoder model used for reranking search results."""
+    rerank_quantize_cpu: bool = False
+    """Whether to quantize the cross-encoder's Linear layers to int8 when reranking on CPU (changes scores slightly)."""
 
     rerank_top_k: int = 3
     """Number of candidates kept after reranking."""
@@ -44,27 +77,7 @@ class RAGConfig(BaseModel):
     use_compressor: bool = True
     """Whether to run the compressor on retrieved context."""
 
-    compressor_prompt: str = (
-                "Ты — система очистки контекста для Retrieval-Augmented Generation.\n"
-        "Вопрос пользователя:\n"
-        "{question}\n\n"
-        "Ниже приведены фрагменты текста из базы знаний.\n"
-        "Твоя задача — вернуть ОДИН связный, осмысленный кусок текста, который "
-        "отвечает на вопрос.\n"
-        "Не добавляй новые знания и не смешивай разные темы.\n"
-        "Пиши одним блоком текста, без списков.\n\n"
-        "Правила:\n"
-        "- Возвращай один цельный абзац\n"
-        "- Удали явные повторы и технический мусор\n"
-        "- Не включай смежные темы, примеры и инструкции, если они не нужны для ответа\n"
-        "- Не добавляй новых сведений и не делай выводов\n"
-        "- Но не сокращай слишком сильно, все то что по теме должно содержаться в ответе\n\n"
-        "Фрагменты:\n"
-        "{fragments_text}\n\n"
-        "Формат ответа:\n"
-        "<один связный абзац>\n\n"
-        "Ответ:\n"
-    )
+    compressor_prompt: str = Field(default_factory=lambda: _DEFAULT_COMPRESSOR_PROMPT)
     """Prompt for context cleaning/compression."""
 
     temperature_model_compressor: float = 0.0
@@ -127,6 +140,40 @@ class RAGConfig(BaseModel):
     section_title_in_embeddings: bool = True
     """Whether to include section titles in embedding texts."""
 
+    bm25_k1: float = 1.2
+    """BM25 term-frequency saturation (k1) for the lexical index."""
+    bm25_b: float = 0.5
+    """BM25 length normalization (b) for the lexical index."""
+    bulk_workers: int = 4
+    """Number of threads used for parallel bulk indexing into Elasticsearch."""
+    bulk_chunk_size: int = 500
+    """Number of documents per Elasticsearch bulk request."""
+    index_refresh_interval: str = "5s"
+    """Elasticsearch refresh interval applied to the lexical index outside of bulk ingest."""
+    index_number_of_replicas: int = 0
+    """Number of Elasticsearch replicas for the lexical index outside of bulk ingest."""
+    index_translog_flush_threshold: str = "1gb"
+    """Elasticsearch translog flush threshold size for the lexical index."""
+    lexical_cache_size: int = 1024
+    """Maximum number of lexical search results kept in the in-process cache (0 disables it)."""
+    lexical_cache_ttl_s: float = 60.0
+    """Time-to-live in seconds for cached lexical search results."""
+    lexical_warmup_filters: bool = True
+    """Whether to warm the Elasticsearch filter cache for the known language/category filters at startup."""
+    index_force_merge: bool = False
+    """Whether to start a background force-merge of the lexical index to one segment after a full ingest."""
+
+    index_batch_size: int = 256
+    """Number of chunks embedded and written to the vector store per batch when building the index."""
+    hnsw_m: int = 32
+    """HNSW graph degree (hnsw:M) for new ChromaDB collections; changing it requires a reindex."""
+    hnsw_construction_ef: int = 200
+    """HNSW candidate list size while building the graph; changing it requires a reindex."""
+    hnsw_search_ef: int = 100
+    """HNSW candidate list size at query time; changing it requires a reindex."""
+    hnsw_num_threads: int | None = None
+    """Threads ChromaDB uses to build the HNSW index (None uses all CPUs)."""
+
     log_mode: int = 0
     """Logging mode bitmask. Always logs user prompt and model answer."""
 
@@ -163,8 +210,9 @@ class RAGConfig(BaseModel):
         It checks for CUDA availability and sets the device accordingly,
         then logs the result.
         """
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = _detect_device()
         log.info(f"Compute device set to: {self.device.upper()}", extra={"log_type": "DEVICE"})
 
     class Config:
         arbitrary_types_allowed = True
+        defer_build = True
@@ -3,10 +3,14 @@ Provides an interface to a sentence-transformer embedding model.
 """
 from __future__ import annotations
 
+import hashlib
 import logging
-from typing import Sequence
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Sequence
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
 from rag.config import RAGConfig
 
@@ -19,6 +23,7 @@ class EmbeddingModel:
         self,
         model_name: str | None = None,
         cfg: RAGConfig | None = None,
+        batch_size: int = 32,
     ) -> None:
         """Initializes the EmbeddingModel, loading the specified model and setting the device."""
         self._cfg = cfg or RAGConfig()
@@ -26,20 +31,109 @@ class EmbeddingModel:
         log.info(f"Loading embedding model: {self.model_name}", extra={'log_type': 'INFO'})
 
         self.device = self._cfg.device
+        self.batch_size = batch_size
+        from sentence_transformers import SentenceTransformer
+
         self._model = SentenceTransformer(self.model_name, device=self.device)
+        self._query_cache: OrderedDict[bytes, tuple[float, ...]] = OrderedDict()
+        self._query_cache_size = 4096
+        self._query_cache_lock = threading.Lock()
 
-    def embed_texts(self, texts: Sequence[str]) -> list[list[float]]:
-        """Creates embeddings for a list of texts."""
+    def embed_texts(self, texts: Sequence[str]) -> np.ndarray:
+        """Creates embeddings for a list of texts as a (len(texts), dim) array."""
         if not texts:
-            return []
+            return np.empty((0, 0), dtype=np.float32)
+
+        if self.device == "cuda" and len(texts) > self.batch_size:
+            vectors = self._encode_pipelined(list(texts))
+        else:
+            vectors = self._model.encode(
+                list(texts),
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+        return vectors
 
-        vectors = self._model.encode(
-            list(texts),
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        )
-        return vectors.tolist()
+    def embed_texts_list(self, texts: Sequence[str]) -> list[list[float]]:
+        """Creates embeddings for a list of texts as plain Python lists."""
+        return self.embed_texts(texts).tolist()
 
     def embed_query(self, text: str) -> list[float]:
-        """Creates an embedding for a single query text."""
-        return self.embed_texts([text])[0]
+        """Creates an embedding for a single query text, reusing cached results for repeated queries."""
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: Sequence[str]) -> list[list[float]]:
+        """
+        Creates embeddings for query texts through a write-through LRU cache: cached
+        queries are served directly and all misses are embedded together in one batch.
+        """
+        keys = [hashlib.blake2b(t.encode("utf-8"), digest_size=16).digest() for t in texts]
+        vectors: list[tuple[float, ...] | None] = [None] * len(texts)
+        misses: dict[bytes, str] = {}
+
+        with self._query_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._query_cache.get(key)
+                if cached is None:
+                    misses[key] = texts[i]
+                    continue
+                self._query_cache.move_to_end(key)
+                vectors[i] = cached
+
+        if misses:
+            embedded = dict(zip(misses, map(tuple, self.embed_texts(list(misses.values())).tolist())))
+            with self._query_cache_lock:
+                for key, vec in embedded.items():
+                    self._query_cache[key] = vec
+                    self._query_cache.move_to_end(key)
+                while len(self._query_cache) > self._query_cache_size:
+                    self._query_cache.popitem(last=False)
+            for i, key in enumerate(keys):
+                if vectors[i] is None:
+                    vectors[i] = embedded[key]
+
+        return [list(v) for v in vectors]  # type: ignore[arg-type]
+
+    def _encode_pipelined(self, texts: list[str]) -> np.ndarray:
+        """
+        Encodes texts on CUDA, tokenizing the next batch into pinned memory on a
+        background thread while the current batch runs on the GPU.
+        """
+        import torch
+
+        # Sort by length like SentenceTransformer.encode does to minimize padding.
+        order = np.argsort([-len(t) for t in texts])
+        sorted_texts = [texts[i] for i in order]
+        batches = [
+            sorted_texts[i : i + self.batch_size]
+            for i in range(0, len(sorted_texts), self.batch_size)
+        ]
+
+        def prepare(batch: list[str]) -> dict[str, Any]:
+            features = self._model.tokenize(batch)
+            return {
+                k: v.pin_memory() if isinstance(v, torch.Tensor) else v
+                for k, v in features.items()
+            }
+
+        outputs: list[torch.Tensor] = []
+        with ThreadPoolExecutor(max_workers=1) as pool, torch.inference_mode():
+            pending = pool.submit(prepare, batches[0])
+            for next_batch in [*batches[1:], None]:
+                features = pending.result()
+                if next_batch is not None:
+                    pending = pool.submit(prepare, next_batch)
+
+                features = {
+                    k: v.to(self.device, non_blocking=True) if isinstance(v, torch.Tensor) else v
+                    for k, v in features.items()
+                }
+                emb = self._model(features)["sentence_embedding"]
+                emb = torch.nn.functional.normalize(emb, p=2, dim=1)
+                outputs.append(emb.float().cpu())
+
+        vectors = torch.cat(outputs).numpy()
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
@@ -4,6 +4,7 @@ Provides a hybrid retriever that combines dense and lexical search results.
 from __future__ import annotations
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from rag.chunking import Chunk
@@ -20,15 +21,22 @@ class HybridRetriever:
         dense: DenseRetriever,
         lexical: ElasticsearchLexicalRetriever,
         alpha: float = 0.5,
+        lexical_workers: int = 8,
     ) -> None:
         """
         Initializes the HybridRetriever with dense and lexical retrievers and a weighting factor.
+        `lexical_workers` bounds how many concurrent callers can have a lexical search in flight.
         """
         self._dense = dense
         self._lexical = lexical
         self._alpha = alpha
+        self._executor = ThreadPoolExecutor(max_workers=max(1, lexical_workers), thread_name_prefix="lexical")
         log.info(f"HybridRetriever initialized with alpha={alpha}", extra={'log_type': 'INFO'})
 
+    def close(self) -> None:
+        """Shuts down the background lexical search threads."""
+        self._executor.shutdown(wait=True)
+
     def build_index(self, chunks: list[Chunk], clear: bool = True) -> None:
         """Builds the index for both the dense and lexical retrievers."""
         self._dense.build_index(chunks, clear=clear)
@@ -42,72 +50,171 @@ class HybridRetriever:
         candidate_k: int = 24,
     ) -> list[dict[str, Any]]:
         """Retrieves and fuses results from dense and lexical retrievers for a given query."""
-        dense_hits = self._dense.retrieve(
+        # Lexical search is a network round-trip to Elasticsearch, so it runs in the
+        # background while dense retrieval embeds the query and queries ChromaDB.
+        lex_future = self._executor.submit(
+            self._lexical.search,
             query,
             top_k=candidate_k,
             language=language,
             category=category,
-            neighbors=0,
         )
 
-        lex_hits = self._lexical.search(
+        dense_hits = self._dense.retrieve(
             query,
             top_k=candidate_k,
             language=language,
             category=category,
+            neighbors=0,
         )
+
+        lex_hits = lex_future.result()
         log.info(f"Retrieved {len(dense_hits)} dense hits and {len(lex_hits)} lexical hits.", extra={'log_type': 'INFO'})
 
-        candidates: dict[str, dict[str, Any]] = {}
+        return self._fuse(dense_hits, lex_hits)
+
+    def retrieve_many(
+        self,
+        queries: list[str],
+        language: str | None = None,
+        category: str | None = None,
+        candidate_k: int = 24,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Retrieves and fuses results for several queries, batching the query embeddings
+        into one forward pass and the lexical side into a single msearch request.
+        Results are returned in query order.
+        """
+        if len(queries) == 1:
+            return [self.retrieve(queries[0], language=language, category=category, candidate_k=candidate_k)]
+
+        lex_future = self._executor.submit(
+            self._lexical.search_many,
+            [(q, language, category) for q in queries],
+            top_k=candidate_k,
+        )
+
+        dense_hits_per_query = self._dense.retrieve_many(
+            queries,
+            top_k=candidate_k,
+            language=language,
+            category=category,
+            neighbors=0,
+        )
+
+        lex_hits_per_query = lex_future.result()
+        return [
+            self._fuse(dense_hits, lex_hits)
+            for dense_hits, lex_hits in zip(dense_hits_per_query, lex_hits_per_query)
+        ]
+
+    def _fuse(
+        self,
+        dense_hits: list[dict[str, Any]],
+        lex_hits: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """Fuses dense and lexical hits into hybrid-scored candidates."""
+        if not dense_hits and not lex_hits:
+            return []
+        if not lex_hits:
+            return self._score_dense_only(dense_hits)
+        if not dense_hits:
+            return self._score_lexical_only(lex_hits)
+
+        # Candidates are kept as parallel arrays indexed via id_to_idx.
+        id_to_idx: dict[str, int] = {}
+        chunks: list[Chunk] = []
+        dense: list[float] = []
+        lex: list[float] = []
+        dense_meta: list[dict[str, Any]] = []
 
         # 1) merge dense
         for h in dense_hits:
-            ch: Chunk = h["main_chunk"]
             dense_score = h.get("score")
             if dense_score is None:
                 continue
 
-            cid = ch.id
-            entry = candidates.setdefault(
-                cid,
-                {"chunk": ch, "dense": 0.0, "lex": 0.0, "dense_meta": {}},
-            )
-            entry["dense"] = max(entry["dense"], float(dense_score))
-            entry["dense_meta"] = h.get("metadata", {}) or {}
+            ch: Chunk = h["main_chunk"]
+            idx = id_to_idx.get(ch.id)
+            if idx is None:
+                idx = id_to_idx[ch.id] = len(chunks)
+                chunks.append(ch)
+                dense.append(0.0)
+                lex.append(0.0)
+                dense_meta.append({})
+            dense[idx] = max(dense[idx], float(dense_score))
+            dense_meta[idx] = h.get("metadata", {}) or {}
 
         # 2) merge lexical
         for h in lex_hits:
-            ch: Chunk = h["chunk"]
-            lex_score = float(h["score"])
-
-            cid = ch.id
-            entry = candidates.setdefault(
-                cid,
-                {"chunk": ch, "dense": 0.0, "lex": 0.0, "dense_meta": {}},
-            )
-            entry["lex"] = max(entry["lex"], lex_score)
+            ch = h["chunk"]
+            idx = id_to_idx.get(ch.id)
+            if idx is None:
+                idx = id_to_idx[ch.id] = len(chunks)
+                chunks.append(ch)
+                dense.append(0.0)
+                lex.append(0.0)
+                dense_meta.append({})
+            lex[idx] = max(lex[idx], float(h["score"]))
 
         # 3) normalize lexical (divide by max)
-        lex_vals = [v["lex"] for v in candidates.values() if v["lex"] > 0]
-        max_lex = max(lex_vals) if lex_vals else 1.0
+        max_lex = max(lex, default=0.0)
+        if max_lex <= 0:
+            max_lex = 1.0
+        alpha = self._alpha
 
         scored: list[dict[str, Any]] = []
-        for v in candidates.values():
-            dense_s = float(v["dense"])
-            lex_s = float(v["lex"])
-            lex_norm = (lex_s / max_lex) if max_lex > 0 else 0.0
-
-            hybrid_score = self._alpha * dense_s + (1.0 - self._alpha) * lex_norm
-
+        for ch, dense_s, lex_s, meta in zip(chunks, dense, lex, dense_meta):
+            lex_norm = lex_s / max_lex
             scored.append(
                 {
-                    "main_chunk": v["chunk"],
-                    "score": hybrid_score,
+                    "main_chunk": ch,
+                    "score": alpha * dense_s + (1.0 - alpha) * lex_norm,
                     "dense_score": dense_s,
                     "lexical_score": lex_s,
                     "lexical_norm": lex_norm,
-                    "metadata": v["dense_meta"],
+                    "metadata": meta,
                 }
             )
 
         return scored
+
+    def _score_dense_only(self, dense_hits: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Scores dense hits when there are no lexical hits to fuse with."""
+        scored: list[dict[str, Any]] = []
+        for h in dense_hits:
+            dense_score = h.get("score")
+            if dense_score is None:
+                continue
+            dense_s = float(dense_score)
+            scored.append(
+                {
+                    "main_chunk": h["main_chunk"],
+                    "score": self._alpha * dense_s,
+                    "dense_score": dense_s,
+                    "lexical_score": 0.0,
+                    "lexical_norm": 0.0,
+                    "metadata": h.get("metadata", {}) or {},
+                }
+            )
+        return scored
+
+    def _score_lexical_only(self, lex_hits: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Scores lexical hits when there are no dense hits to fuse with."""
+        lex_scores = [float(h["score"]) for h in lex_hits]
+        max_lex = max(lex_scores)
+        if max_lex <= 0:
+            max_lex = 1.0
+        weight = 1.0 - self._alpha
+
+        return [
+            {
+                "main_chunk": h["chunk"],
+                "score": weight * (lex_s / max_lex),
+                "dense_score": 0.0,
+                "lexical_score": lex_s,
+                "lexical_norm": lex_s / max_lex,
+                "metadata": {},
+            }
+            for h, lex_s in zip(lex_hits, lex_scores)
+        ]
@@ -3,11 +3,11 @@ Provides functions for ingesting and processing documents from a directory.
 """
 from __future__ import annotations
 
+import io
 import logging
+import re
 from pathlib import Path
 
-from docx import Document
-import fitz
 from pydantic import BaseModel
 
 from rag.config import RAGConfig
@@ -16,19 +16,13 @@ from support_function.detect_function import detect_category
 
 log = logging.getLogger(__name__)
 
-def normalize_text(text: str) -> str:
-    """Normalizes text by standardizing line endings and removing trailing whitespace."""
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-
-    lines = [line.rstrip() for line in text.split("\n")]
+# Trailing whitespace + line break, plus any following whitespace-only lines.
+_LINE_BREAKS_RE = re.compile(r"[^\S\r\n]*(?:\r\n?|\n)(?:[^\S\r\n]*(?:\r\n?|\n))*")
 
-    normalized_lines: list[str] = []
 
-    for line in lines:
-        if line != "":
-            normalized_lines.append(line)
-
-    return "\n".join(normalized_lines).strip()
+def normalize_text(text: str) -> str:
+    """Normalizes text by standardizing line endings and removing trailing whitespace and empty lines."""
+    return _LINE_BREAKS_RE.sub("\n", text).strip()
 
 class RawDocument(BaseModel):
     """A metadata class representing a raw document."""
@@ -49,6 +43,8 @@ def read_txt(path: Path) -> str:
 
 def read_docx(path: Path) -> str:
     """Reads text content from a .docx file."""
+    from docx import Document
+
     doc = Document(path)
     texts = [p.text for p in doc.paragraphs]
     return "\n".join(texts)
@@ -56,11 +52,14 @@ def read_docx(path: Path) -> str:
 
 def read_pdf(path: Path) -> str:
     """Reads text content from a .pdf file."""
-    texts: list[str] = []
+    import fitz
+
+    buf = io.StringIO()
     with fitz.open(path) as doc:
         for page in doc:
-            texts.append(page.get_text())
-    return "\n".join(texts)
+            buf.write(page.get_text())
+            buf.write("\n")
+    return buf.getvalue()
 
 
 def ingest_directory(path_dir: Path, cfg: RAGConfig) -> list[RawDocument]:
@@ -116,7 +115,7 @@ def ingest_directory(path_dir: Path, cfg: RAGConfig) -> list[RawDocument]:
         )
 
         documents.append(
-            RawDocument(
+            RawDocument.model_construct(
                 id=file.stem,
                 path=file,
                 text=text,
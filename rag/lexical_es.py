@@ -4,9 +4,15 @@ Provides an Elasticsearch-based lexical retriever.
 from __future__ import annotations
 
 import logging
-from typing import Any, List
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Iterator, List
 
-from elasticsearch.helpers import bulk
+import orjson
+from elasticsearch import ApiError, TransportError
+from elasticsearch.helpers import parallel_bulk
 
 from search.es_client import get_es
 from rag.chunking import Chunk
@@ -14,27 +20,75 @@ from rag.config import RAGConfig
 
 log = logging.getLogger(__name__)
 
+LIGHT_SOURCE_FIELDS = [
+    "id",
+    "doc_id",
+    "doc_name",
+    "section_title",
+    "order",
+    "language",
+    "category",
+    "start_char",
+    "end_char",
+]
+"""All indexed chunk fields except `text`, for searches whose texts are hydrated later via `fetch_texts`."""
+
+
+def _normalize(q: str) -> str:
+    """Folds width/compatibility forms and case so query variants share one cache entry."""
+    return unicodedata.normalize("NFKC", q).casefold().strip()
+
 
 class ElasticsearchLexicalRetriever:
     """Manages indexing and searching text chunks in Elasticsearch."""
+
+    _INDEX_EXISTS: set[str] = set()
+    """Index names known to exist in this process, to skip repeated existence checks."""
+
     def __init__(self, index_name: str = "hd_chunks", cfg: RAGConfig | None = None) -> None:
         """Initializes the Elasticsearch client and ensures the index exists."""
         self._cfg = cfg or RAGConfig()
         self._es = get_es()
         self._index_name = index_name
+        self._search_cache: OrderedDict[tuple, tuple[float, tuple[dict[str, Any], ...]]] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        self._fields = ["text"]
+        if self._cfg.section_title_boost and self._cfg.section_title_boost > 0:
+            self._fields.append(f"section_title^{self._cfg.section_title_boost}")
+        self._no_filter_body_template = self._compile_no_filter_body_template()
         self._ensure_index()
+        if self._cfg.lexical_warmup_filters:
+            self._warmup_filters()
 
     def _ensure_index(self) -> None:
         """Creates the Elasticsearch index with the correct mapping if it doesn't exist."""
+        if self._index_name in type(self)._INDEX_EXISTS:
+            return
         if not self._es.indices.exists(index=self._index_name):
-            log.info(f"Creating Elasticsearch index: {self._index_name}", extra={'log_type': 'INFO'})
+            log.info("Creating Elasticsearch index: %s", self._index_name, extra={'log_type': 'INFO'})
             body = {
+                "settings": {
+                    "index": {
+                        "refresh_interval": self._cfg.index_refresh_interval,
+                        "number_of_replicas": self._cfg.index_number_of_replicas,
+                        "translog": {
+                            "flush_threshold_size": self._cfg.index_translog_flush_threshold,
+                        },
+                        "similarity": {
+                            "custom_bm25": {
+                                "type": "BM25",
+                                "k1": self._cfg.bm25_k1,
+                                "b": self._cfg.bm25_b,
+                            }
+                        },
+                    }
+                },
                 "mappings": {
                     "properties": {
                         "id":        {"type": "keyword"},
                         "doc_id":    {"type": "keyword"},
                         "doc_name":  {"type": "keyword"},
-                        "text":      {"type": "text"},
+                        "text":      {"type": "text", "index_options": "freqs", "similarity": "custom_bm25"},
                         "section_title": {"type": "text"},
                         "order":     {"type": "integer"},
                         "language":  {"type": "keyword"},
@@ -45,16 +99,58 @@ class ElasticsearchLexicalRetriever:
                 }
             }
             self._es.indices.create(index=self._index_name, body=body)
+        type(self)._INDEX_EXISTS.add(self._index_name)
 
     def index_chunks(self, chunks: List[Chunk], clear: bool = True) -> None:
         """Indexes a list of chunks into Elasticsearch."""
         if clear:
             self.clear_index()
+        self._invalidate_search_cache()
 
-        log.info(f"Indexing {len(chunks)} chunks into Elasticsearch...", extra={'log_type': 'INFO'})
-        actions = []
+        if self._info_enabled():
+            log.info("Indexing %d chunks into Elasticsearch...", len(chunks), extra={'log_type': 'INFO'})
+        failed = 0
+        # Disable refresh and replicas while bulk loading, restore them afterwards.
+        self._es.indices.put_settings(
+            index=self._index_name,
+            body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}},
+        )
+        try:
+            for ok, info in parallel_bulk(
+                self._es,
+                self._gen_actions(chunks),
+                thread_count=self._cfg.bulk_workers,
+                chunk_size=self._cfg.bulk_chunk_size,
+                raise_on_error=False,
+            ):
+                if not ok:
+                    failed += 1
+                    log.error("Failed to index chunk: %s", info, extra={'log_type': 'ERROR'})
+
+            self._es.indices.refresh(index=self._index_name)
+            if clear and self._cfg.index_force_merge:
+                # Runs as a background task; waiting on it would outlast the client's request timeout.
+                self._es.indices.forcemerge(
+                    index=self._index_name, max_num_segments=1, wait_for_completion=False
+                )
+        finally:
+            self._es.indices.put_settings(
+                index=self._index_name,
+                body={
+                    "index": {
+                        "refresh_interval": self._cfg.index_refresh_interval,
+                        "number_of_replicas": self._cfg.index_number_of_replicas,
+                    }
+                },
+            )
+
+        if self._info_enabled():
+            log.info("Finished indexing. Failed: %d.", failed, extra={'log_type': 'INFO'})
+
+    def _gen_actions(self, chunks: List[Chunk]) -> Iterator[dict[str, Any]]:
+        """Yields bulk index actions for the given chunks one at a time."""
         for c in chunks:
-            actions.append({
+            yield {
                 "_index": self._index_name,
                 "_id": c.id,
                 "_source": {
@@ -69,72 +165,263 @@ class ElasticsearchLexicalRetriever:
                     "start_char": c.start_char,
                     "end_char": c.end_char,
                 },
-            })
-
-        bulk(self._es, actions)
-        log.info("Finished indexing.", extra={'log_type': 'INFO'})
+            }
 
     def clear_index(self) -> None:
         """Deletes and recreates the Elasticsearch index."""
-        log.info(f"Clearing Elasticsearch index: {self._index_name}", extra={'log_type': 'INFO'})
+        log.info("Clearing Elasticsearch index: %s", self._index_name, extra={'log_type': 'INFO'})
+        self._invalidate_search_cache()
+        type(self)._INDEX_EXISTS.discard(self._index_name)
         if self._es.indices.exists(index=self._index_name):
             self._es.indices.delete(index=self._index_name)
         self._ensure_index()
 
-    def search(self, query: str, top_k: int = 10, language: str | None = None, category: str | None = None) -> List[Any]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        language: str | None = None,
+        category: str | None = None,
+        source_fields: list[str] | None = None,
+    ) -> List[Any]:
+        """
+        Performs a lexical search, serving repeated queries from an in-process cache.
+        `source_fields` limits the returned `_source` (e.g. `LIGHT_SOURCE_FIELDS`); chunks
+        fetched without `text` have an empty text that can be filled with `fetch_texts`.
+        """
+        q = _normalize(query)
+        key = self._cache_key(q, top_k, language, category, source_fields)
+        cached = self._cache_get(key)
+        if cached is not None:
+            log.debug("Lexical cache hit for query: '%s'", q)
+            return cached
+
+        results = self._search_uncached(q, top_k, language, category, source_fields)
+        self._cache_put(key, results)
+        return [dict(r) for r in results]
+
+    def fetch_texts(self, ids: list[str]) -> dict[str, str]:
+        """Fetches chunk texts by id in a single mget request."""
+        if not ids:
+            return {}
+
+        resp = self._es.mget(index=self._index_name, ids=ids, source_includes=["text"])
+        return {
+            d["_id"]: d["_source"].get("text", "")
+            for d in resp["docs"]
+            if d.get("found")
+        }
+
+    def search_many(
+        self,
+        queries: list[tuple[str, str | None, str | None]],
+        top_k: int = 10,
+    ) -> list[List[Any]]:
+        """
+        Performs several lexical searches in one msearch round-trip.
+        Each query is a (query, language, category) tuple; results are returned in the same order.
+        """
+        results: list[List[Any] | None] = [None] * len(queries)
+        pending: list[int] = []
+        searches: list[dict[str, Any]] = []
+
+        queries = [(_normalize(query), language, category) for query, language, category in queries]
+        for i, (query, language, category) in enumerate(queries):
+            cached = self._cache_get(self._cache_key(query, top_k, language, category))
+            if cached is not None:
+                results[i] = cached
+                continue
+            pending.append(i)
+            searches.append({"index": self._index_name, "request_cache": True})
+            searches.append(self._build_search_body(query, top_k, language, category))
+
+        if pending:
+            if self._info_enabled():
+                log.info("Performing lexical msearch for %d queries.", len(pending), extra={'log_type': 'INFO'})
+            resp = self._es.msearch(body=searches)
+
+            for i, r in zip(pending, resp["responses"]):
+                if "error" in r:
+                    log.error("Lexical msearch failed for query '%s': %s", queries[i][0], r["error"], extra={'log_type': 'ERROR'})
+                    results[i] = []
+                    continue
+                query, language, category = queries[i]
+                hits = self._parse_hits(r["hits"]["hits"])
+                self._cache_put(self._cache_key(query, top_k, language, category), hits)
+                results[i] = [dict(h) for h in hits]
+
+        return [r or [] for r in results]
+
+    def _cache_key(
+        self,
+        query: str,
+        top_k: int,
+        language: str | None,
+        category: str | None,
+        source_fields: list[str] | None = None,
+    ) -> tuple:
+        return (
+            query,
+            language,
+            category,
+            top_k,
+            tuple(source_fields) if source_fields is not None else None,
+        )
+
+    def _cache_get(self, key: tuple) -> List[Any] | None:
+        """Returns a copy of the cached results for key, or None on a miss or expiry."""
+        if self._cfg.lexical_cache_size <= 0:
+            return None
+        with self._search_cache_lock:
+            cached = self._search_cache.get(key)
+            if cached is None or cached[0] <= time.monotonic():
+                return None
+            self._search_cache.move_to_end(key)
+            return [dict(r) for r in cached[1]]
+
+    def _cache_put(self, key: tuple, results: List[Any]) -> None:
+        if self._cfg.lexical_cache_size <= 0:
+            return
+        with self._search_cache_lock:
+            self._search_cache[key] = (time.monotonic() + self._cfg.lexical_cache_ttl_s, tuple(results))
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > self._cfg.lexical_cache_size:
+                self._search_cache.popitem(last=False)
+
+    def _info_enabled(self) -> bool:
+        """
+        Whether INFO records with log_type 'INFO' would be emitted. LogModeFilter drops
+        them unless log_mode bit 2 is set, so the record is not worth building otherwise.
+        """
+        return bool(self._cfg.log_mode & 2) and log.isEnabledFor(logging.INFO)
+
+    def _warmup_filters(self) -> None:
+        """
+        Runs one size=0 search per known language/category filter combination,
+        so the first user queries find the filter bitsets already cached.
+        """
+        searches: list[dict[str, Any]] = []
+        for language in (None, "ru", "en"):
+            for category in (None, "gate", "channel", "center"):
+                filters = self._build_filters(language, category)
+                if not filters:
+                    continue
+                searches.append({"index": self._index_name, "request_cache": True})
+                searches.append({
+                    "query": {"bool": {"filter": filters}},
+                    "size": 0,
+                    "track_total_hits": False,
+                })
+
+        try:
+            self._es.msearch(body=searches)
+        except (ApiError, TransportError) as e:
+            log.warning("Lexical filter warmup failed: %s", e, extra={'log_type': 'WARNING'})
+
+    def _invalidate_search_cache(self) -> None:
+        """Drops cached search results after the index contents change."""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+
+    def _search_uncached(
+        self,
+        query: str,
+        top_k: int,
+        language: str | None,
+        category: str | None,
+        source_fields: list[str] | None = None,
+    ) -> List[Any]:
         """Performs a lexical search against the Elasticsearch index."""
-        filters: list[dict[str, Any]] = []
+        if source_fields is None and not self._build_filters(language, category):
+            # Common case: splice the query into the pre-serialized body template.
+            if self._info_enabled():
+                log.info("Performing lexical search for query: '%s' with filters: []", query, extra={'log_type': 'INFO'})
+            resp = self._es.perform_request(
+                "POST",
+                f"/{self._index_name}/_search",
+                params={"request_cache": "true", "preference": "_local"},
+                headers={"content-type": "application/json", "accept": "application/json"},
+                body=self._no_filter_body_template % (orjson.dumps(query), top_k),
+            )
+        else:
+            resp = self._es.search(
+                index=self._index_name,
+                body=self._build_search_body(query, top_k, language, category, source_fields),
+                request_cache=True,
+                preference="_local",
+            )
 
-        if language in ("ru", "en"):
-            filters.append({
-                "terms": {"language": [language, "mixed"]}
-            })
+        hits = resp["hits"]["hits"]
+        if self._info_enabled():
+            log.info("Found %d lexical hits.", len(hits), extra={'log_type': 'INFO'})
+        return self._parse_hits(hits)
 
-        if category in ("gate", "channel", "center"):
-            filters.append({"term": {"category": category}})
-        
-        log.info(f"Performing lexical search for query: '{query}' with filters: {filters}", extra={'log_type': 'INFO'})
+    def _build_search_body(
+        self,
+        query: str,
+        top_k: int,
+        language: str | None,
+        category: str | None,
+        source_fields: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Builds the search request body for a single lexical query."""
+        filters = self._build_filters(language, category)
 
-        fields = ["text"]
-        if self._cfg.section_title_boost and self._cfg.section_title_boost > 0:
-            fields.append(f"section_title^{self._cfg.section_title_boost}")
+        if self._info_enabled():
+            log.info("Performing lexical search for query: '%s' with filters: %s", query, filters, extra={'log_type': 'INFO'})
 
-        body = {
+        body: dict[str, Any] = {
             "query": {
                 "bool": {
                     "must": {
                         "multi_match": {
                             "query": query,
-                            "fields": fields,
+                            "fields": self._fields,
                         }
                     },
                     "filter": filters or [],
                 }
             },
             "size": top_k,
+            "track_total_hits": False,
         }
+        if source_fields is not None:
+            body["_source"] = source_fields
+        return body
 
-        resp = self._es.search(index=self._index_name, body=body)
+    def _build_filters(self, language: str | None, category: str | None) -> list[dict[str, Any]]:
+        """Builds the language/category filter clauses for a lexical query."""
+        filters: list[dict[str, Any]] = []
 
-        hits = resp["hits"]["hits"]
-        log.info(f"Found {len(hits)} lexical hits.", extra={'log_type': 'INFO'})
+        if language in ("ru", "en"):
+            filters.append({
+                "terms": {"language": [language, "mixed"]}
+            })
+
+        if category in ("gate", "channel", "center"):
+            filters.append({"term": {"category": category}})
 
+        return filters
+
+    def _compile_no_filter_body_template(self) -> bytes:
+        """
+        Pre-serializes the search body used when there are no filters.
+        The result has `%s` for the JSON-encoded query and `%d` for the size.
+        """
+        fields_json = orjson.dumps(self._fields).replace(b"%", b"%%")
+        return (
+            b'{"query":{"bool":{"must":{"multi_match":{"query":%s,"fields":'
+            + fields_json
+            + b'}},"filter":[]}},"size":%d,"track_total_hits":false}'
+        )
+
+    def _parse_hits(self, hits: list[dict[str, Any]]) -> List[Any]:
+        """Converts raw Elasticsearch hits into chunk/score result dicts."""
         results: list[dict[str, Any]] = []
         for h in hits:
             src = h["_source"]
 
-            chunk = Chunk(
-                id=src["id"],
-                doc_id=src["doc_id"],
-                doc_name=src["doc_name"],
-                text=src["text"],
-                order=src["order"],
-                section_title=src.get("section_title"),
-                start_char=src.get("start_char", 0),
-                end_char=src.get("end_char", 0),
-                language=src.get("language"),
-                category=src.get("category"),
-            )
+            chunk = Chunk.from_es_hit(src)
 
             results.append(
                 {
@@ -7,16 +7,121 @@ from __future__ import annotations
 
 import os
 import time
+import asyncio
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from rag.config import RAGConfig
 
 log = logging.getLogger(__name__)
 
 
+def _build_session(headers: dict[str, str] | None = None) -> requests.Session:
+    """
+    Creates a pooled, keep-alive HTTP session with retries on transient 5xx errors.
+    A single session is reused for all requests made by a client.
+    Read errors are not retried: the POST may already have been processed, and a
+    re-sent generation would multiply the timeout and the billed calls.
+    Rate limiting (429) is handled by `_post_with_backoff`.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=2,
+            connect=2,
+            read=0,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def _build_async_client(timeout_s: float, headers: dict[str, str] | None = None) -> httpx.AsyncClient:
+    """Creates a pooled async HTTP client for concurrent LLM requests."""
+    return httpx.AsyncClient(
+        timeout=timeout_s,
+        headers=headers,
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+    )
+
+
+_RATE_LIMIT_ATTEMPTS = 3
+_RATE_LIMIT_BASE_DELAY_S = 1.0
+
+
+def _retry_delay(headers, attempt: int) -> float:
+    """Returns the delay before the next attempt, honoring a Retry-After header if present."""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return _RATE_LIMIT_BASE_DELAY_S * (2 ** attempt)
+
+
+def _post_with_backoff(
+    session: requests.Session,
+    url: str,
+    payload: dict,
+    timeout_s: float,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    Posts a request, retrying rate-limited (429) responses with backoff.
+    The status is inspected once; any other error status raises `requests.HTTPError`.
+    """
+    attempt = 0
+    while True:
+        resp = session.post(url, json=payload, timeout=timeout_s, stream=stream)
+        if resp.status_code == 429 and attempt + 1 < _RATE_LIMIT_ATTEMPTS:
+            delay = _retry_delay(resp.headers, attempt)
+            resp.close()
+            log.warning("Rate limited by %s, retrying in %.1fs", url, delay, extra={'log_type': 'WARNING'})
+            time.sleep(delay)
+            attempt += 1
+            continue
+        if resp.status_code >= 400:
+            resp.close()
+            raise requests.HTTPError(f"{resp.status_code} Error for url: {url}", response=resp)
+        return resp
+
+
+async def _apost_with_backoff(client: httpx.AsyncClient, url: str, payload: dict) -> httpx.Response:
+    """Async counterpart of `_post_with_backoff`; error statuses raise `httpx.HTTPStatusError`."""
+    attempt = 0
+    while True:
+        resp = await client.post(url, json=payload)
+        if resp.status_code == 429 and attempt + 1 < _RATE_LIMIT_ATTEMPTS:
+            delay = _retry_delay(resp.headers, attempt)
+            log.warning("Rate limited by %s, retrying in %.1fs", url, delay, extra={'log_type': 'WARNING'})
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        if resp.status_code >= 400:
+            raise httpx.HTTPStatusError(
+                f"{resp.status_code} Error for url: {url}",
+                request=resp.request,
+                response=resp,
+            )
+        return resp
+
+
 def _get_env_api_key() -> str:
     """
     Retrieves the API key from environment variables.
@@ -35,6 +140,10 @@ class LLMClient:
     provide a consistent method for generating text from a prompt. This class
     is intended for text generation only and does not include any RAG-specific logic.
     """
+    _aclient: httpx.AsyncClient | None = None
+    _aclient_loop: asyncio.AbstractEventLoop | None = None
+    _aclient_headers: dict[str, str] | None = None
+
     def generate(self, prompt: str, lang: Optional[str] = None) -> str:
         """
         Generates text based on a given prompt.
@@ -42,6 +151,46 @@ class LLMClient:
         """
         raise NotImplementedError
 
+    def generate_stream(self, prompt: str, lang: Optional[str] = None) -> Iterator[str]:
+        """
+        Generates text based on a given prompt, yielding it in pieces as it arrives.
+        The default implementation yields the full `generate` result at once.
+        """
+        yield self.generate(prompt, lang)
+
+    async def agenerate(self, prompt: str, lang: Optional[str] = None) -> str:
+        """
+        Asynchronously generates text based on a given prompt.
+        The default implementation runs `generate` in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate, prompt, lang)
+
+    async def agenerate_many(self, prompts: list[str], lang: Optional[str] = None) -> list[str]:
+        """Generates texts for several prompts concurrently, preserving their order."""
+        return list(await asyncio.gather(*(self.agenerate(p, lang) for p in prompts)))
+
+    async def aclose(self) -> None:
+        """
+        Closes the pooled async HTTP client, if one was created on the running loop.
+        A client left over from an already finished loop is simply dropped.
+        """
+        if self._aclient is not None and self._aclient_loop is asyncio.get_running_loop():
+            await self._aclient.aclose()
+        self._aclient = None
+        self._aclient_loop = None
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """
+        Returns the pooled async HTTP client for the running event loop.
+        Pooled connections are bound to the loop that opened them, so a new client
+        is created whenever the client is used from a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = _build_async_client(self.timeout_s, self._aclient_headers)
+            self._aclient_loop = loop
+        return self._aclient
+
 
 class GroqLLMClient(LLMClient):
     """
@@ -65,6 +214,12 @@ class GroqLLMClient(LLMClient):
         self.temperature = temperature if temperature is not None else getattr(cfg, "api_temperature")
         self.max_tokens = max_tokens if max_tokens is not None else getattr(cfg, "api_max_tokens")
         self.timeout_s = timeout_s if timeout_s is not None else getattr(cfg, "api_timeout_s")
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        self._session = _build_session(headers)
+        self._aclient_headers = headers
 
         log.info(
             "Groq LLM init: base_url=%s model=%s temp=%s max_tokens=%s timeout=%ss",
@@ -77,30 +232,80 @@ class GroqLLMClient(LLMClient):
         Sends a request to the Groq API to generate text and returns the response.
         It constructs the request payload in the OpenAI-compatible format and handles API errors.
         """
-        url = f"{self.base_url.rstrip('/')}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.model_name,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "messages": [{"role": "user", "content": prompt}],
-        }
+        t0 = time.time()
+        try:
+            resp = _post_with_backoff(self._session, self._url(), self._build_payload(prompt), self.timeout_s)
+        except requests.RequestException as e:
+            log.error("Groq request failed: %s", e, extra={'log_type': 'ERROR'})
+            raise
+
+        dt = time.time() - t0
+        log.info("Groq response: status=%s time=%.2fs", resp.status_code, dt, extra={'log_type': 'MODEL_RESPONSE'})
+        return self._extract_content(orjson.loads(resp.content))
 
+    def generate_stream(self, prompt: str, lang: Optional[str] = None) -> Iterator[str]:
+        """
+        Streams generated text from the Groq API as server-sent events,
+        yielding content deltas as soon as they arrive.
+        """
         t0 = time.time()
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=self.timeout_s)
-            resp.raise_for_status()
+            resp = _post_with_backoff(
+                self._session,
+                self._url(),
+                self._build_payload(prompt, stream=True),
+                self.timeout_s,
+                stream=True,
+            )
         except requests.RequestException as e:
             log.error("Groq request failed: %s", e, extra={'log_type': 'ERROR'})
             raise
 
+        with resp:
+            for line in resp.iter_lines():
+                if not line or not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:"):].strip()
+                if data == b"[DONE]":
+                    break
+                # The trailing usage chunk carries an empty choices list.
+                choices = orjson.loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+        dt = time.time() - t0
+        log.info("Groq stream finished: status=%s time=%.2fs", resp.status_code, dt, extra={'log_type': 'MODEL_RESPONSE'})
+
+    async def agenerate(self, prompt: str, lang: Optional[str] = None) -> str:
+        """Asynchronously sends a request to the Groq API using a pooled httpx client."""
+        t0 = time.time()
+        try:
+            resp = await _apost_with_backoff(self._async_client(), self._url(), self._build_payload(prompt))
+        except httpx.HTTPError as e:
+            log.error("Groq request failed: %s", e, extra={'log_type': 'ERROR'})
+            raise
+
         dt = time.time() - t0
         log.info("Groq response: status=%s time=%.2fs", resp.status_code, dt, extra={'log_type': 'MODEL_RESPONSE'})
+        return self._extract_content(orjson.loads(resp.content))
+
+    def _url(self) -> str:
+        return f"{self.base_url.rstrip('/')}/chat/completions"
+
+    def _build_payload(self, prompt: str, stream: bool = False) -> dict:
+        payload = {
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
 
-        data = resp.json()
+    @staticmethod
+    def _extract_content(data: dict) -> str:
         content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
 
         if not content or not content.strip():
@@ -131,6 +336,7 @@ class OllamaLLMClient(LLMClient):
         self.temperature = temperature if temperature is not None else getattr(cfg, "local_temperature", 0.3)
         self.max_tokens = max_tokens if max_tokens is not None else getattr(cfg, "local_max_tokens", 800)
         self.timeout_s = timeout_s if timeout_s is not None else getattr(cfg, "local_timeout_s", 120)
+        self._session = _build_session()
 
         log.info(
             "Ollama LLM init: url=%s model=%s", self.base_url, self.model_name,
@@ -142,29 +348,78 @@ class OllamaLLMClient(LLMClient):
         Sends a request to the local Ollama server to generate text.
         It includes parameters for temperature and token limits, tailored to the Ollama API.
         """
-        url = f"{self.base_url.rstrip('/')}/api/chat"
-        payload = {
-            "model": self.model_name,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
-            "options": {
-                "temperature": self.temperature,
-                "num_predict": self.max_tokens,
-            },
-        }
+        t0 = time.time()
+        try:
+            resp = _post_with_backoff(self._session, self._url(), self._build_payload(prompt), self.timeout_s)
+        except requests.RequestException as e:
+            log.error("Ollama request failed: %s", e, extra={'log_type': 'ERROR'})
+            raise
+
+        dt = time.time() - t0
+        log.info("Ollama response: status=%s time=%.2fs", resp.status_code, dt, extra={'log_type': 'MODEL_RESPONSE'})
+        return self._extract_content(orjson.loads(resp.content))
 
+    def generate_stream(self, prompt: str, lang: Optional[str] = None) -> Iterator[str]:
+        """
+        Streams generated text from the local Ollama server,
+        yielding message content from each JSON line as it arrives.
+        """
         t0 = time.time()
         try:
-            resp = requests.post(url, json=payload, timeout=self.timeout_s)
-            resp.raise_for_status()
+            resp = _post_with_backoff(
+                self._session,
+                self._url(),
+                self._build_payload(prompt, stream=True),
+                self.timeout_s,
+                stream=True,
+            )
         except requests.RequestException as e:
             log.error("Ollama request failed: %s", e, extra={'log_type': 'ERROR'})
             raise
 
+        with resp:
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                content = data.get("message", {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
+
+        dt = time.time() - t0
+        log.info("Ollama stream finished: status=%s time=%.2fs", resp.status_code, dt, extra={'log_type': 'MODEL_RESPONSE'})
+
+    async def agenerate(self, prompt: str, lang: Optional[str] = None) -> str:
+        """Asynchronously sends a request to the local Ollama server using a pooled httpx client."""
+        t0 = time.time()
+        try:
+            resp = await _apost_with_backoff(self._async_client(), self._url(), self._build_payload(prompt))
+        except httpx.HTTPError as e:
+            log.error("Ollama request failed: %s", e, extra={'log_type': 'ERROR'})
+            raise
+
         dt = time.time() - t0
         log.info("Ollama response: status=%s time=%.2fs", resp.status_code, dt, extra={'log_type': 'MODEL_RESPONSE'})
+        return self._extract_content(orjson.loads(resp.content))
+
+    def _url(self) -> str:
+        return f"{self.base_url.rstrip('/')}/api/chat"
+
+    def _build_payload(self, prompt: str, stream: bool = False) -> dict:
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+            "options": {
+                "temperature": self.temperature,
+                "num_predict": self.max_tokens,
+            },
+        }
 
-        data = resp.json()
+    @staticmethod
+    def _extract_content(data: dict) -> str:
         content = data.get("message", {}).get("content", "")
         if not content or not content.strip():
             log.error("Ollama returned empty content. Raw: %s", data, extra={'log_type': 'ERROR'})
@@ -179,7 +434,7 @@ def init_llm_client(cfg: RAGConfig) -> LLMClient:
     and instantiates either a 'GroqLLMClient' for API-based models or an 'OllamaLLMClient' for local models.
     """
     mode = cfg.local_or_API_model
-    log.info(f"Initializing LLM client in '{mode}' mode.", extra={'log_type': 'INFO'})
+    log.info("Initializing LLM client in '%s' mode.", mode, extra={'log_type': 'INFO'})
     if mode == "API":
         return GroqLLMClient(cfg)
     if mode == "local":
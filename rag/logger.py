@@ -3,11 +3,16 @@ This module provides a centralized, color-coded logging setup for the applicatio
 It uses the colorama library to differentiate log messages by type and level,
 improving readability in the console output.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from colorama import Fore, Style, init
 
 _LOG_MODE = 0
+_LISTENER: logging.handlers.QueueListener | None = None
+_FILE_BUFFER: logging.handlers.MemoryHandler | None = None
 
 
 def set_log_mode(mode: int) -> None:
@@ -18,26 +23,28 @@ def set_log_mode(mode: int) -> None:
         _LOG_MODE = 0
 
 
+# Log mode bit required for each log_type; -1 means the record always passes.
+_TYPE_BITS = {
+    "USER_QUERY": -1,
+    "MODEL_RESPONSE": -1,
+    "ENHANCEMENT": 1,
+    "INFO": 2,
+    "METADATA": 2,
+    "DEVICE": 2,
+    "DEBUG": 2,
+    "CONTEXT_AFTER_RERANK": 4,
+    "CONTEXT_BEFORE": 4,
+    "CONTEXT_AFTER": 4,
+}
+
+
 class LogModeFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
-        log_type = getattr(record, "log_type", record.levelname)
-
         if record.levelno >= logging.WARNING:
             return True
 
-        if log_type in {"USER_QUERY", "MODEL_RESPONSE"}:
-            return True
-
-        if log_type == "ENHANCEMENT":
-            return bool(_LOG_MODE & 1)
-
-        if log_type in {"CONTEXT_AFTER_RERANK", "CONTEXT_BEFORE", "CONTEXT_AFTER"}:
-            return bool(_LOG_MODE & 4)
-
-        if log_type in {"INFO", "METADATA", "DEVICE", "DEBUG"}:
-            return bool(_LOG_MODE & 2)
-
-        return True
+        bits = _TYPE_BITS.get(getattr(record, "log_type", record.levelname), -1)
+        return bits == -1 or bool(_LOG_MODE & bits)
 
 class ColoredFormatter(logging.Formatter):
     """
@@ -59,10 +66,13 @@ class ColoredFormatter(logging.Formatter):
         'DEFAULT': Fore.WHITE,
     }
 
+    LEVEL_NAMES = frozenset({'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'})
+
     def __init__(self, fmt="%(message)s"):
         """Initializes the formatter and colorama."""
         super().__init__(fmt)
         init(autoreset=True)
+        self._fmt_cache: dict[str, logging.Formatter] = {}
 
     def format(self, record):
         """
@@ -72,22 +82,39 @@ class ColoredFormatter(logging.Formatter):
         log_type = getattr(record, 'log_type', record.levelname)
         color = self.LOG_COLORS.get(log_type, self.LOG_COLORS['DEFAULT'])
 
-        if log_type in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']:
+        if log_type in self.LEVEL_NAMES:
             log_fmt = f"{Style.BRIGHT}[{record.levelname}]{Style.NORMAL} {self._fmt}"
         else:
             log_fmt = self._fmt
 
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._fmt_cache.get(log_fmt)
+        if formatter is None:
+            formatter = self._fmt_cache.setdefault(log_fmt, logging.Formatter(log_fmt))
         return color + formatter.format(record) + Style.RESET_ALL
 
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that enqueues records as-is. The listener runs in the same process,
+    so message formatting can be left to it instead of happening on the logging thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 def setup_logging(cfg=None, mode: int | None = None):
     """
     Configures the root logger for the application.
     This setup includes:
-    - A colored console handler for INFO-level messages.
-    - A file handler for DEBUG-level messages.
+    - A colored console handler for INFO-level messages, written synchronously so
+      output stays ordered with the CLI's own prompts.
+    - A file handler for DEBUG-level messages, opened lazily on first write and
+      fed through a memory buffer that is written out in batches or on ERROR.
+    - A queue in front of the file path, so file I/O runs on a background listener thread.
     - Suppression of excessive logging from third-party libraries.
     """
+    global _LISTENER, _FILE_BUFFER
+
     # Set higher logging levels for noisy third-party libraries
     logging.getLogger("elastic_transport").setLevel(logging.WARNING)
     logging.getLogger("elasticsearch").setLevel(logging.WARNING)
@@ -104,18 +131,45 @@ def setup_logging(cfg=None, mode: int | None = None):
     # Clear existing handlers to avoid duplicate logs
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
+    _stop_listener()
+    _LISTENER = None
+    _FILE_BUFFER = None
 
     # Console handler for readable, colored output
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(ColoredFormatter())
     console_handler.addFilter(LogModeFilter())
-    root_logger.addHandler(console_handler)
 
     # File handler for detailed, persistent logs
-    file_handler = logging.FileHandler("app.log", mode='a', encoding='utf-8')
+    file_handler = logging.FileHandler("app.log", mode='a', encoding='utf-8', delay=True)
     file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_formatter)
     file_handler.addFilter(LogModeFilter())
-    root_logger.addHandler(file_handler)
+    _FILE_BUFFER = logging.handlers.MemoryHandler(
+        capacity=1024, flushLevel=logging.ERROR, target=file_handler, flushOnClose=True
+    )
+    _FILE_BUFFER.setLevel(logging.DEBUG)
+
+    # The console stays on the root logger; the listener thread owns only the file path.
+    # Filtering on the queue handler keeps dropped records from being enqueued.
+    root_logger.addHandler(console_handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _InProcessQueueHandler(log_queue)
+    queue_handler.addFilter(LogModeFilter())
+    root_logger.addHandler(queue_handler)
+
+    _LISTENER = logging.handlers.QueueListener(log_queue, _FILE_BUFFER, respect_handler_level=True)
+    _LISTENER.start()
+
+
+def _stop_listener() -> None:
+    """Drains the log queue and writes out buffered file records."""
+    if _LISTENER is not None:
+        _LISTENER.stop()
+    if _FILE_BUFFER is not None:
+        _FILE_BUFFER.close()
+
+
+atexit.register(_stop_listener)
@@ -15,6 +15,11 @@ from rag.lexical_es import ElasticsearchLexicalRetriever
 from rag.vector_store import VectorStore
 
 log = logging.getLogger(__name__)
+log_info = logging.LoggerAdapter(log, {'log_type': 'INFO'})
+
+_HYBRID: tuple[RAGConfig | None, HybridRetriever] | None = None
+"""The most recently built retriever and the config object it was built for."""
+
 
 def build_hybrid_retriever(
     cfg: RAGConfig | None = None,
@@ -24,14 +29,22 @@ def build_hybrid_retriever(
 ) -> HybridRetriever:
     """
     Constructs and returns a `HybridRetriever`, optionally re-indexing the data.
+    Without reindexing, repeated calls with the same config object (or no config)
+    return the same retriever instead of reloading the embedding model.
     """
+    global _HYBRID
+
+    if not reindex and _HYBRID is not None and _HYBRID[0] is cfg:
+        return _HYBRID[1]
+
+    cfg_key = cfg
     cfg = cfg or RAGConfig()
 
     dense = DenseRetriever(cfg=cfg)
     lexical = ElasticsearchLexicalRetriever(index_name="hd_chunks", cfg=cfg)
 
     if reindex:
-        log.info("Reindex enabled: rebuilding indexes...", extra={'log_type': 'INFO'})
+        log_info.info("Reindex enabled: rebuilding indexes...")
 
         documents = ingest_all(cfg=cfg)
         chunks = chunk_documents(
@@ -47,9 +60,11 @@ def build_hybrid_retriever(
         hybrid = HybridRetriever(dense=dense, lexical=lexical, alpha=0.6)
         hybrid.build_index(chunks)
 
-        log.info("Indexing finished.", extra={'log_type': 'INFO'})
-        return hybrid
+        log_info.info("Indexing finished.")
+    else:
+        log_info.info("Using existing indexes.")
+        hybrid = HybridRetriever(dense=dense, lexical=lexical, alpha=0.6)
 
-    log.info("Using existing indexes.", extra={'log_type': 'INFO'})
-    return HybridRetriever(dense=dense, lexical=lexical, alpha=0.6)
+    _HYBRID = (cfg_key, hybrid)
+    return hybrid
 
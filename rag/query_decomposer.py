@@ -4,9 +4,11 @@ from typing import List
 
 log = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r"\w+")
+
 
 def _word_count(text: str) -> int:
-    return len(re.findall(r"\w+", text))
+    return len(_WORD_RE.findall(text))
 
 
 class QueryDecomposer:
@@ -58,20 +60,6 @@ class QueryDecomposer:
         )
 
     def _parse_response(self, text: str) -> List[str]:
-        lines = [l.strip() for l in text.splitlines()]
-        lines = [l for l in lines if l]
-
-        clean = []
-        for l in lines:
-            if len(l) < 3:
-                continue
-            clean.append(l)
-
-        seen = set()
-        result = []
-        for q in clean:
-            if q not in seen:
-                seen.add(q)
-                result.append(q)
-
-        return result
+        # dict.fromkeys dedupes while keeping the first-seen order.
+        stripped = (l.strip() for l in text.splitlines())
+        return list(dict.fromkeys(s for s in stripped if len(s) >= 3))
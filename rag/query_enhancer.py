@@ -12,6 +12,9 @@ from support_function.detect_function import detect_language
 
 log = logging.getLogger(__name__)
 
+_CYRILLIC_RE = re.compile(r"[А-Яа-яЁё]")
+_JSON_DECODER = json.JSONDecoder()
+
 
 class QueryEnhancer:
     """
@@ -29,7 +32,7 @@ class QueryEnhancer:
             return [], None
 
         target_lang = detect_language(query)
-        prompt = self._build_prompt(query)
+        prompt = self._build_prompt(query, target_lang)
 
         try:
             raw = self.llm.generate(prompt)
@@ -73,8 +76,7 @@ class QueryEnhancer:
 
         return clean_variations, hypo
 
-    def _build_prompt(self, query: str) -> str:
-        lang = detect_language(query)
+    def _build_prompt(self, query: str, lang: str | None) -> str:
         count = self.variations_count
 
         if lang == "ru":
@@ -116,19 +118,20 @@ class QueryEnhancer:
 
     @staticmethod
     def _has_cyrillic(text: str) -> bool:
-        return bool(re.search(r"[А-Яа-яЁё]", text))
+        # str.isascii() reads a flag cached on the string, so ASCII text skips the regex scan.
+        return not text.isascii() and _CYRILLIC_RE.search(text) is not None
 
     def _parse_json(self, text: str) -> dict | None:
         if not text:
             return None
 
         start = text.find("{")
-        end = text.rfind("}")
-        if start == -1 or end == -1 or end <= start:
+        if start == -1:
             return None
 
-        raw = text[start : end + 1]
+        # Decode the first JSON object in place; trailing text or fences are ignored.
         try:
-            return json.loads(raw)
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
         except json.JSONDecodeError:
             return None
+        return obj if isinstance(obj, dict) else None
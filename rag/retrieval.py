@@ -4,14 +4,45 @@ Provides a dense retriever for vector-based document search.
 from __future__ import annotations
 
 import logging
-from typing import Any
+from collections import Counter
+from typing import Any, Iterator, Sequence
+
+import numpy as np
 
 from rag.config import RAGConfig
-from rag.chunking import Chunk
+from rag.chunking import Chunk, ChunkTable
 from rag.embeddings import EmbeddingModel
 from rag.vector_store import VectorStore
 
 log = logging.getLogger(__name__)
+log_info = logging.LoggerAdapter(log, {'log_type': 'INFO'})
+
+
+class ChunkWindow(Sequence[Chunk]):
+    """A read-only view of chunks[start:end] that does not copy the underlying tuple."""
+    __slots__ = ("_chunks", "_start", "_end")
+
+    def __init__(self, chunks: tuple[Chunk, ...], start: int, end: int) -> None:
+        self._chunks = chunks
+        self._start = max(0, start)
+        self._end = max(self._start, min(end, len(chunks)))
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __iter__(self) -> Iterator[Chunk]:
+        chunks = self._chunks
+        for i in range(self._start, self._end):
+            yield chunks[i]
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return self._chunks[self._start:self._end][i]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("ChunkWindow index out of range")
+        return self._chunks[self._start + i]
 
 
 class DenseRetriever:
@@ -32,83 +63,135 @@ class DenseRetriever:
         self._store = store
 
         self._chunks_by_id: dict[str, Chunk] = {}
-        self._chunks_by_doc: dict[str, list[Chunk]] = {}
+        self._chunks_by_doc: dict[str, tuple[Chunk, ...]] = {}
 
     def build_index(self, chunks: list[Chunk], clear: bool = True) -> None:
         """Builds the vector index from a list of chunks."""
-        log.info(f"Building vector store index with {len(chunks)} chunks...", extra={'log_type': 'INFO'})
-
-        if self._cfg.section_title_in_embeddings:
-            texts = [
-                f"{c.section_title}\n{c.text}" if c.section_title else c.text
-                for c in chunks
-            ]
-        else:
-            texts = [c.text for c in chunks]
-        embeddings = self._embedder.embed_texts(texts)
-
-        self._store.index_chunks(chunks, embeddings)
-
-        self._chunks_by_id = {c.id: c for c in chunks}
-
-        self._chunks_by_doc = {}
-        for c in chunks:
-            self._chunks_by_doc.setdefault(c.doc_id, []).append(c)
+        log_info.info("Building vector store index with %d chunks...", len(chunks))
+
+        table = ChunkTable.from_chunks(chunks)
+        texts = table.embedding_texts(self._cfg.section_title_in_embeddings)
+
+        def embed_batch(start: int, end: int) -> np.ndarray:
+            return self._embedder.embed_texts(texts[start:end])
+
+        # Embedding of batch i+1 overlaps with the vector-store add of batch i.
+        self._store.index_chunks_streaming(chunks, embed_batch)
+
+        self._chunks_by_id = dict(zip(table.ids, chunks))
+
+        self._chunks_by_doc = self._group_by_doc(table, chunks)
+
+        log_info.info("Finished building vector store index.")
+
+    @staticmethod
+    def _group_by_doc(table: ChunkTable, chunks: list[Chunk]) -> dict[str, tuple[Chunk, ...]]:
+        """
+        Groups chunks by document into tuples ordered by `order`. Chunk orders are a dense 0..k-1
+        range per document, so each chunk is placed directly into its slot; a document
+        whose orders do not fit that shape falls back to a sort.
+        """
+        by_doc: dict[str, list[Chunk | None]] = {
+            doc_id: [None] * count for doc_id, count in Counter(table.doc_ids).items()
+        }
+        unplaced: set[str] = set()
+        for doc_id, order, c in zip(table.doc_ids, table.orders, chunks):
+            slots = by_doc[doc_id]
+            if 0 <= order < len(slots) and slots[order] is None:
+                slots[order] = c
+            else:
+                unplaced.add(doc_id)
 
-        for doc_id, doc_chunks in self._chunks_by_doc.items():
-            doc_chunks.sort(key=lambda x: x.order)
-        
-        log.info("Finished building vector store index.", extra={'log_type': 'INFO'})
+        for doc_id in unplaced:
+            by_doc[doc_id] = sorted(
+                (c for d, c in zip(table.doc_ids, chunks) if d == doc_id),
+                key=lambda x: x.order,
+            )
+        return {doc_id: tuple(slots) for doc_id, slots in by_doc.items()}  # type: ignore[misc]
 
     def retrieve(self, query: str, top_k: int = 5, language: str | None = None, category: str | None = None, neighbors: int = 0) -> list[dict[str, Any]]:
         """Retrieves relevant documents for a given query from the vector store."""
         q_vec = self._embedder.embed_query(query)
-        
+        return self._retrieve_by_vector(query, q_vec, top_k, language, category, neighbors)
+
+    def retrieve_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        language: str | None = None,
+        category: str | None = None,
+        neighbors: int = 0,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Retrieves documents for several queries, embedding all uncached ones in a single batch.
+        Results are returned in query order.
+        """
+        if not queries:
+            return []
+
+        q_vecs = self._embedder.embed_queries(queries)
+        return [
+            self._retrieve_by_vector(query, q_vec, top_k, language, category, neighbors)
+            for query, q_vec in zip(queries, q_vecs)
+        ]
+
+    def _retrieve_by_vector(
+        self,
+        query: str,
+        q_vec: list[float],
+        top_k: int,
+        language: str | None,
+        category: str | None,
+        neighbors: int,
+    ) -> list[dict[str, Any]]:
+        """Queries the vector store with an already computed query embedding."""
         where_filter = {"language": language, "category": category}
-        log.info(f"Performing dense retrieval for query: '{query}' with filter: {where_filter}", extra={'log_type': 'INFO'})
+        log_info.info("Performing dense retrieval for query: '%s' with filter: %s", query, where_filter)
 
-        hits = self._store.query(q_vec, n_results=top_k, where=where_filter)
-        log.info(f"Found {len(hits)} dense hits.", extra={'log_type': 'INFO'})
+        ids, documents, metadatas, distances = self._store.query_arrays(q_vec, n_results=top_k, where=where_filter)
+        log_info.info("Found %d dense hits.", len(ids))
 
         results: list[dict[str, Any]] = []
 
-        for h in hits:
-            chunk_id = str(h.get("id") or "")
-            distance = h.get("distance")
-
-            meta = h.get("metadata", {})
-            text = str(h.get("document") or "")
-
-            chunk = Chunk(
-                id=chunk_id,
-                doc_id=meta.get("doc_id") or "",
-                doc_name=meta.get("doc_name", "unknown"),
-                text=text,
-                order=meta.get("order", 0),
-                section_title=meta.get("section_title"),
-                language=meta.get("language"),
-                category=meta.get("category"),
-                start_char=meta.get("start_char"),
-                end_char=meta.get("end_char"),
-                allowed_roles=meta.get("allowed_roles"),
-            )
-
-            idx = chunk.order
+        # Scores for all hits in one vectorized pass over the distance array.
+        scores = (1.0 / (1.0 + distances.astype(np.float64))).tolist()
+
+        for hit_id, document, meta, distance, score in zip(ids, documents, metadatas, distances.tolist(), scores):
+            chunk_id = str(hit_id or "")
+
+            meta = meta or {}
+
+            # Chunks indexed in this process are reused; after a restart they are rebuilt from metadata.
+            chunk = self._chunks_by_id.get(chunk_id)
+            if chunk is None:
+                chunk = Chunk(
+                    id=chunk_id,
+                    doc_id=meta.get("doc_id") or "",
+                    doc_name=meta.get("doc_name", "unknown"),
+                    text=str(document or ""),
+                    order=meta.get("order", 0),
+                    section_title=meta.get("section_title"),
+                    language=meta.get("language"),
+                    category=meta.get("category"),
+                    start_char=meta.get("start_char"),
+                    end_char=meta.get("end_char"),
+                    allowed_roles=meta.get("allowed_roles"),
+                )
+
+            context_chunks: Sequence[Chunk]
             if neighbors > 0:
-                start = max(0, idx - 1)
-                end = idx + neighbors + 1
-                context_chunks = self._chunks_by_doc.get(chunk.doc_id, [])[start:end]
+                idx = chunk.order
+                context_chunks = ChunkWindow(self._chunks_by_doc.get(chunk.doc_id, ()), idx - 1, idx + neighbors + 1)
             else:
-                context_chunks = [chunk]
-
+                context_chunks = (chunk,)
 
             results.append(
                 {
                     "chunk": context_chunks,
                     "main_chunk": chunk,
                     "distance": distance,
-                    "score": 1.0 / (1.0 + distance) if distance is not None else None,
-                    "metadata": h.get("metadata", {}),
+                    "score": score,
+                    "metadata": meta,
                 }
             )
 
@@ -4,15 +4,76 @@ Provides a ChromaDB-based vector store for managing and querying document chunks
 from __future__ import annotations
 
 import logging
-from typing import Any
+import operator
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import starmap
+from types import MappingProxyType
+from typing import Any, Callable, Sequence
 
 import chromadb
+import numpy as np
 
 from rag.config import RAGConfig
 from rag.chunking import Chunk
 
 log = logging.getLogger(__name__)
 
+_META_KEYS = (
+    "doc_id",
+    "doc_name",
+    "order",
+    "section_title",
+    "language",
+    "category",
+    "start_char",
+    "end_char",
+    "allowed_roles",
+)
+"""Chunk attributes stored as ChromaDB metadata."""
+_META_GET = operator.attrgetter(*_META_KEYS)
+_ID_GET = operator.attrgetter("id")
+_TEXT_GET = operator.attrgetter("text")
+_MISSING = object()
+
+
+def _unit_rows(vectors: np.ndarray | list[list[float]]) -> np.ndarray:
+    """Returns the rows of vectors scaled to unit L2 norm as a float32 array."""
+    arr = np.asarray(vectors, dtype=np.float32)
+    return arr / np.clip(np.linalg.norm(arr, axis=-1, keepdims=True), 1e-12, None)
+
+def _flatten_where(where: dict[str, Any] | None) -> dict[str, Any] | None:
+    """
+    Simplifies a Chroma where clause without changing its meaning: single-operand
+    `$and`/`$or` are unwrapped and nested operators of the same kind are merged.
+    """
+    if not where:
+        return None
+    if len(where) != 1:
+        return where
+
+    op, operands = next(iter(where.items()))
+    if op not in ("$and", "$or") or not isinstance(operands, list):
+        return where
+
+    flat: list[dict[str, Any]] = []
+    for operand in operands:
+        operand = _flatten_where(operand)
+        if operand is None:
+            continue
+        if len(operand) == 1 and op in operand:
+            flat.extend(operand[op])
+        else:
+            flat.append(operand)
+
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return {op: flat}
+
+
 class VectorStore:
     """A wrapper around a ChromaDB collection for indexing and querying chunks."""
     def __init__(
@@ -26,44 +87,76 @@ class VectorStore:
 
         self._cfg = cfg
         self._collection_name = collection_name
-        log.info(f"Initializing ChromaDB client with path: {cfg.chroma_db}", extra={'log_type': 'INFO'})
+        log.info("Initializing ChromaDB client with path: %s", cfg.chroma_db, extra={'log_type': 'INFO'})
 
         self._client = chromadb.PersistentClient(path=str(cfg.chroma_db))
         self._collection = self._client.get_or_create_collection(
             name=collection_name,
-            metadata={"hnsw:space": "cosine"},
+            metadata=self._collection_metadata(),
         )
-        log.info(f"Using ChromaDB collection: '{collection_name}'", extra={'log_type': 'INFO'})
+        self._neighbors_raw = lru_cache(maxsize=2048)(self._neighbors_raw_uncached)
+        self._where_cache: dict[tuple, dict[str, Any] | None] = {}
+        log.info("Using ChromaDB collection: '%s'", collection_name, extra={'log_type': 'INFO'})
 
-    def index_chunks(self, chunks: list[Chunk], embeddings: list[list[float]]) -> None:
+    def index_chunks(self, chunks: list[Chunk], embeddings: np.ndarray | list[list[float]]) -> None:
         """Adds a batch of chunks and their embeddings to the collection."""
         if len(chunks) != len(embeddings):
             raise ValueError("Количество чанков не равно количеству эмбеддингов!")
+        if not chunks:
+            return
+        self._neighbors_raw.cache_clear()
 
-        log.info(f"Indexing {len(chunks)} chunks into ChromaDB...", extra={'log_type': 'INFO'})
-        ids = [chunk.id for chunk in chunks]
-        documents = [chunk.text for chunk in chunks]
-        metadatas = [
-            {
-                "doc_id": c.doc_id,
-                "doc_name": c.doc_name,
-                "order": c.order,
-                "section_title": c.section_title,
-                "language": c.language,
-                "category": c.category,
-                "start_char": c.start_char,
-                "end_char": c.end_char,
-                "allowed_roles": c.allowed_roles,
-            }
-            for c in chunks
-        ]
+        log.info("Indexing %d chunks into ChromaDB...", len(chunks), extra={'log_type': 'INFO'})
+        # The collection uses inner-product space, which equals cosine only for unit vectors.
+        # Normalized once up front; the add() batches below are row slices of this matrix.
+        embeddings = _unit_rows(embeddings)
+        if embeddings.ndim != 2:
+            raise ValueError(f"Ожидалась двумерная матрица эмбеддингов, получено измерений: {embeddings.ndim}")
+        ids = list(map(_ID_GET, chunks))
+        documents = list(map(_TEXT_GET, chunks))
+        metadatas = [dict(zip(_META_KEYS, values)) for values in map(_META_GET, chunks)]
 
-        self._collection.add(
-            ids=ids,
-            documents=documents,
-            embeddings=embeddings,  # type: ignore[arg-type]
-            metadatas=metadatas,  # type: ignore[arg-type]
-        )
+        # Bounded adds keep memory flat and stay under Chroma's max batch size.
+        batch_size = max(1, self._cfg.index_batch_size)
+        max_batch_size = getattr(self._client, "get_max_batch_size", None)
+        if max_batch_size is not None:
+            batch_size = min(batch_size, max_batch_size())
+
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self._collection.add(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],  # type: ignore[arg-type]
+                metadatas=metadatas[start:end],  # type: ignore[arg-type]
+            )
+
+    def index_chunks_streaming(
+        self,
+        chunks: Sequence[Chunk],
+        embed_fn: Callable[[int, int], np.ndarray | list[list[float]]],
+        batch_size: int | None = None,
+    ) -> int:
+        """
+        Embeds and indexes chunks batch by batch, computing the next batch's embeddings
+        on a helper thread while the current batch is added to the collection.
+        `embed_fn(start, end)` returns the embeddings for `chunks[start:end]`.
+        Returns the number of chunks indexed.
+        """
+        batch_size = max(1, batch_size or self._cfg.index_batch_size)
+        bounds = [(start, min(start + batch_size, len(chunks))) for start in range(0, len(chunks), batch_size)]
+        if not bounds:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed") as executor:
+            future = executor.submit(embed_fn, *bounds[0])
+            for (start, end), next_bounds in zip(bounds, bounds[1:] + [None]):
+                embeddings = future.result()
+                if next_bounds is not None:
+                    future = executor.submit(embed_fn, *next_bounds)
+                self.index_chunks(chunks[start:end], embeddings)
+
+        return len(chunks)
 
     def get_neighbors(self, chunk: Chunk, neighbors_forward: int = 3) -> list[Chunk]:
         """Retrieves neighboring chunks after the main chunk (forward window)."""
@@ -80,113 +173,165 @@ class VectorStore:
         neighbors_forward: int = 3,
     ) -> list[Chunk]:
         """Retrieves neighboring chunks in both directions around the main chunk."""
-        hits = self.search_by_metadata(
+        if neighbors_backward == 0 and neighbors_forward == 0:
+            # The window is the chunk itself: a lookup by id skips the metadata filter.
+            return list(starmap(Chunk.from_chroma, zip(*self._get_columns(ids=[chunk.id]))))
+
+        hits = self._neighbors_raw(
+            chunk.doc_id,
+            chunk.order - neighbors_backward,
+            chunk.order + neighbors_forward,
+        )
+
+        # Records are cached already sorted by order.
+        return list(starmap(Chunk.from_chroma, hits))
+
+    def _neighbors_raw_uncached(self, doc_id: str, lo: int, hi: int) -> tuple[tuple[str, str, MappingProxyType], ...]:
+        """
+        Fetches the chunks of doc_id with lo <= order <= hi as immutable
+        (id, text, metadata) records, sorted by order.
+        """
+        ids, documents, metadatas = self._get_columns(
             where={
                 "$and": [
-                    {"doc_id": chunk.doc_id},
-                    {"order": {"$gte": chunk.order - neighbors_backward}},
-                    {"order": {"$lte": chunk.order + neighbors_forward}},
+                    {"doc_id": doc_id},
+                    {"order": {"$gte": lo}},
+                    {"order": {"$lte": hi}},
                 ]
             }
         )
-
-        chunks = []
-        for h in hits:
-            meta = h["metadata"]
-            chunks.append(
-                Chunk(
-                    id=h["id"],
-                    doc_id=meta["doc_id"],
-                    doc_name=meta["doc_name"],
-                    text=h["document"],
-                    order=meta["order"],
-                    start_char=meta.get("start_char", 0),
-                    end_char=meta.get("end_char", 0),
-                    section_title=meta.get("section_title"),
-                    language=meta.get("language"),
-                    category=meta.get("category"),
-                    allowed_roles=meta.get("allowed_roles"),
-                )
-            )
-
-        return sorted(chunks, key=lambda c: c.order)
+        records = [
+            (m["order"], (i, d, MappingProxyType(m)))
+            for i, d, m in zip(ids, documents, metadatas)
+        ]
+        records.sort(key=operator.itemgetter(0))
+        return tuple(map(operator.itemgetter(1), records))
 
 
     def query(self, query_embedding: list[float], n_results: int = 5, where: dict[str, Any] | None = None) -> list[dict[str, Any]]:
         """Performs a vector similarity search with optional metadata filtering."""
+        ids, documents, metadatas, distances = self.query_arrays(query_embedding, n_results=n_results, where=where)
+        hits: list[dict[str, Any]] = [
+            {"id": i, "document": d, "metadata": m, "distance": dist}
+            for i, d, m, dist in zip(ids, documents, metadatas, distances.tolist())
+        ]
+        log.debug("ChromaDB query returned %d hits.", len(hits))
+        return hits
+
+    def query_arrays(
+        self,
+        query_embedding: list[float],
+        n_results: int = 5,
+        where: dict[str, Any] | None = None,
+    ) -> tuple[list[str], list[str], list[dict[str, Any]], np.ndarray]:
+        """
+        Performs a vector similarity search and returns the result columns as
+        (ids, documents, metadatas, distances), with distances as a float32 array.
+        """
         kwargs: dict[str, Any] = {
-            "query_embeddings": [query_embedding],
+            "query_embeddings": [_unit_rows(query_embedding).tolist()],
             "n_results": n_results,
+            "include": ["documents", "metadatas", "distances"],
         }
-        where = where or {}
-        if self._cfg.vector_filter_builder:
-            built = self._cfg.vector_filter_builder(where)
-            if built:
-                kwargs["where"] = built
+        built = self._compile_where(where or {})
+        if built:
+            kwargs["where"] = built
 
-        log.info(f"Querying ChromaDB with where clause: {kwargs.get('where')}", extra={'log_type': 'INFO'})
+        log.info("Querying ChromaDB with where clause: %s", kwargs.get("where"), extra={'log_type': 'INFO'})
         result = self._collection.query(
             **kwargs
         )
         if result is None:
-            return []
+            return [], [], [], np.empty(0, dtype=np.float32)
 
         ids = (result.get("ids") or [[]])[0]
         documents = (result.get("documents") or [[]])[0]
         metadatas = (result.get("metadatas") or [[]])[0]
-        distances = (result.get("distances") or [[]])[0]
-
-        hits: list[dict[str, Any]] = []
-        for i in range(len(ids)):
-            hits.append(
-                {
-                    "id": ids[i],
-                    "document": documents[i],
-                    "metadata": metadatas[i],
-                    "distance": distances[i],
-                }
-            )
-        log.debug("ChromaDB query returned %d hits.", len(hits))
-        return hits
+        distances = np.asarray((result.get("distances") or [[]])[0], dtype=np.float32)
+        return ids, documents, metadatas, distances
+
+    def _compile_where(self, where: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        Builds the Chroma where clause via `cfg.vector_filter_builder`, memoized per
+        builder and filter values (a handful of language/category combinations).
+        """
+        builder = self._cfg.vector_filter_builder
+        if not builder:
+            return None
+
+        try:
+            key = (builder, tuple(sorted(where.items())))
+            cached = self._where_cache.get(key, _MISSING)
+        except TypeError:
+            # Unhashable filter values are built on every call.
+            return _flatten_where(builder(where))
+        if cached is not _MISSING:
+            return cached
+
+        built = _flatten_where(builder(where))
+        if len(self._where_cache) >= 64:
+            self._where_cache.clear()
+        self._where_cache[key] = built
+        return built
 
     def search_by_metadata(
         self,
         where: dict[str, Any],
     ) -> list[dict[str, Any]]:
         """Retrieves chunks based on metadata filters only."""
+        ids, documents, metadatas = self._get_columns(where)
+        return [
+            {"id": i, "document": d, "metadata": m}
+            for i, d, m in zip(ids, documents, metadatas)
+        ]
+
+    def _get_columns(
+        self,
+        where: dict[str, Any] | None = None,
+        ids: list[str] | None = None,
+    ) -> tuple[list[str], list[str], list[dict[str, Any]]]:
+        """Fetches (ids, documents, metadatas) for a metadata filter or a list of ids as parallel lists."""
         result = self._collection.get(
+            ids=ids,
             where=where,
+            include=["documents", "metadatas"],
         )
         if result is None:
-            return []
-
-        ids = result.get("ids") or []
-        documents = result.get("documents") or []
-        metadatas = result.get("metadatas") or []
-
-        hits = []
-        for i in range(len(ids)):
-            hits.append(
-                {
-                    "id": ids[i],
-                    "document": documents[i],
-                    "metadata": metadatas[i],
-                }
-            )
+            return [], [], []
 
-        return hits
+        return (
+            result.get("ids") or [],
+            result.get("documents") or [],
+            result.get("metadatas") or [],
+        )
 
 
     def clear_index(self, condition: dict | None = None) -> None:
         """Deletes documents from the collection or clears the entire collection."""
+        self._neighbors_raw.cache_clear()
         if condition:
-            log.info(f"Deleting documents from collection '{self._collection_name}' with condition: {condition}", extra={'log_type': 'INFO'})
+            log.info("Deleting documents from collection '%s' with condition: %s", self._collection_name, condition, extra={'log_type': 'INFO'})
             self._collection.delete(where=condition)
             return
 
-        log.info(f"Deleting and recreating collection: '{self._collection_name}'", extra={'log_type': 'INFO'})
+        log.info("Deleting and recreating collection: '%s'", self._collection_name, extra={'log_type': 'INFO'})
         self._client.delete_collection(self._collection_name)
         self._collection = self._client.get_or_create_collection(
             name=self._collection_name,
-            metadata={"hnsw:space": "cosine"},
+            metadata=self._collection_metadata(),
         )
+
+    def _collection_metadata(self) -> dict[str, Any]:
+        """
+        HNSW settings for a new collection. Chroma fixes them when the collection is
+        created, so changing them takes effect after a reindex (`clear_index`).
+        Vectors are unit-normalized before add/query, so inner product ranks like cosine
+        and its distance (1 - dot) equals the cosine distance.
+        """
+        return {
+            "hnsw:space": "ip",
+            "hnsw:M": self._cfg.hnsw_m,
+            "hnsw:construction_ef": self._cfg.hnsw_construction_ef,
+            "hnsw:search_ef": self._cfg.hnsw_search_ef,
+            "hnsw:num_threads": self._cfg.hnsw_num_threads or os.cpu_count() or 1,
+        }
@@ -4,22 +4,61 @@ Provides client and health check functions for Elasticsearch.
 from __future__ import annotations
 
 import logging
+from functools import lru_cache
+from typing import Any
+
+import orjson
 from elasticsearch import Elasticsearch
+from elasticsearch.serializer import JSONSerializer
 
 log = logging.getLogger(__name__)
 
 ES_URL = "http://127.0.0.1:9200"
 
+
+class OrjsonSerializer(JSONSerializer):
+    """JSON serializer for the Elasticsearch client backed by orjson."""
+
+    def dumps(self, data: Any) -> bytes:
+        if isinstance(data, (str, bytes)):
+            return super().dumps(data)
+        return orjson.dumps(data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Let the base serializer raise its usual SerializationError.
+            return super().loads(data)
+
+
+@lru_cache(maxsize=1)
 def get_es() -> Elasticsearch:
-    """Returns an Elasticsearch client instance."""
-    log.info(f"Creating Elasticsearch client for URL: {ES_URL}", extra={'log_type': 'INFO'})
-    return Elasticsearch(ES_URL)
+    """Returns the shared Elasticsearch client, creating it and its connection pool on first use."""
+    log.info("Creating Elasticsearch client for URL: %s", ES_URL, extra={'log_type': 'INFO'})
+    return Elasticsearch(
+        ES_URL,
+        serializer=OrjsonSerializer(),
+        connections_per_node=10,
+        request_timeout=30,
+        max_retries=1,
+        retry_on_timeout=True,
+    )
 
-def check_es_or_die(es: Elasticsearch) -> None:
-    """Checks if the Elasticsearch service is available, otherwise raises a RuntimeError."""
+def check_es_or_die(es: Elasticsearch, wait_seconds: int = 30) -> None:
+    """
+    Checks if the Elasticsearch service is available, otherwise raises a RuntimeError.
+    Waits server-side, in a single request, for the cluster to reach at least yellow status.
+    """
     try:
         info = es.info()
-        log.info(f"Successfully connected to Elasticsearch version {info['version']['number']}", extra={'log_type': 'INFO'})
+        log.info("Successfully connected to Elasticsearch version %s", info["version"]["number"], extra={'log_type': 'INFO'})
+        health = es.options(request_timeout=wait_seconds + 5).cluster.health(
+            wait_for_status="yellow",
+            timeout=f"{wait_seconds}s",
+        )
+        if health.get("timed_out"):
+            raise RuntimeError(f"Cluster status is still {health.get('status')} after {wait_seconds}s")
     except Exception as e:
         log.error("Failed to connect to Elasticsearch.", extra={'log_type': 'ERROR'})
         raise RuntimeError(
@@ -2,8 +2,18 @@
 Provides helper functions for detecting language and category from text.
 """
 
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+
+_CATEGORY_KEYWORDS = (
+    ("gate", ("gate", "ворота")),
+    ("channel", ("channel", "канал")),
+    ("center", ("center", "центр")),
+)
+"""Category keywords in priority order; the first category with a matching keyword wins."""
+
 def detect_category(text: str | Path) -> str | None:
     """
     Detects a category from text or file path by searching for keywords.
@@ -13,18 +23,20 @@ def detect_category(text: str | Path) -> str | None:
 
     text = text.lower()
 
-    if "gate" in text or "ворота" in text:
-        return "gate"
-    if "channel" in text or "канал" in text:
-        return "channel"
-    if "center" in text or "центр" in text:
-        return "center"
+    for category, keywords in _CATEGORY_KEYWORDS:
+        for keyword in keywords:
+            if keyword in text:
+                return category
     return "general"
 
+@lru_cache(maxsize=1024)
 def detect_language(text: str) -> str | None:
     """Detects if text is primarily Russian, English, or mixed."""
-    cyrillic_chars = sum(1 for char in text if 'а' <= char <= 'я' or 'А' <= char <= 'Я')
-    latin_chars = sum(1 for char in text if 'a' <= char <= 'z' or 'A' <= char <= 'Z')
+    # Count letters over the code points in one vectorized pass: А-Я/а-я is U+0410..U+044F.
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    cyrillic_chars = int(np.count_nonzero((codes >= 0x0410) & (codes <= 0x044F)))
+    upper = codes & ~np.uint32(0x20)
+    latin_chars = int(np.count_nonzero((upper >= 0x41) & (upper <= 0x5A)))
 
     if cyrillic_chars == 0 and latin_chars == 0:
         return "mixed"